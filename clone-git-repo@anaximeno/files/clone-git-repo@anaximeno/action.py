@@ -2,7 +2,12 @@
 import os
 import sys
 import re
+import codecs
+import contextlib
+import signal
+import functools
 import subprocess
+import collections
 
 import aui
 import text
@@ -10,53 +15,92 @@ import gi
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("Gio", "2.0")
-from gi.repository import Gtk, Gdk, Gio
-from pathlib import Path
+from gi.repository import Gio, GLib
+from typing import Final
 
 
-NEMO_DEBUG = os.environ.get("NEMO_DEBUG", "")
-DEBUG = "Actions" in NEMO_DEBUG if NEMO_DEBUG else False
+# NEMO_DEBUG lists debug domains, e.g. "Actions,Window", separated by any of the
+# characters GLib accepts there: colons, semicolons, commas and whitespace.
+DEBUG: Final[bool] = "Actions" in re.split(
+    r"[:;,\s]+", os.environ.get("NEMO_DEBUG", "")
+)
+# Opt-in partial clone, file contents are then only fetched when checked out.
+FAST_CLONE: Final[bool] = os.environ.get("CLONE_ACTION_FAST") == "1"
 UNCOMMON_REPO_NAME_CHARS_SET = set("!\"#$%&'()*+,:;<=>?@[\\]^`{|}~")
-REPO_NAME_REGEX = r"\/([^\/]+)(\.git)?$"
+REPO_NAME_REGEX = re.compile(r"[/:]([^/:]+?)(?:\.git)?/*\Z")
+CLEAN_ADDRESS_REGEX = re.compile(
+    r"\s*(?:git\s+clone(?:\s+|$))?(.*[^\s?/]|)[\s?/]*", re.DOTALL
+)
+SCHEME_REGEX = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://")
+PROGRESS_TICK_MS = 100
+MAX_CLIPBOARD_ADDRESS_LENGTH = 2048
+CLONE_INFO_MAX_LINES = 10
+WIN_ICON_PATH = aui.get_action_icon_path(text.UUID)
+LOG_PREFIX = f"Action {text.UUID}:"
 
 
-def log(*args, **kwargs):
-    if DEBUG is True:
-        print(f"Action {text.UUID}:", *args, **kwargs)
+if DEBUG is True:
+
+    def log(*args, **kwargs):
+        print(LOG_PREFIX, *args, **kwargs)
+
+else:
+
+    def log(*args, **kwargs):
+        pass
 
 
 def _r(text: str) -> str:
-    ovewritten, *ovewrites = text.split("\r")
+    *ovewrittens, ovewrite = text.split("\r")
+    pieces, size = [ovewrite], len(ovewrite)
 
-    for ovewrite in ovewrites:
-        l = len(ovewrite)
-        ovewritten = ovewrite + ovewritten[l:]
+    # Walk back from the last write, only keeping what sticks out of it.
+    for ovewritten in reversed(ovewrittens):
+        if len(ovewritten) > size:
+            pieces.append(ovewritten[size:])
+            size = len(ovewritten)
 
-    return ovewritten
+    return "".join(pieces)
 
 
 class GitRepoCloneAction:
     def __init__(self, directory: str, assume_protocol: str = "http") -> None:
         self._directory = directory
         self._assume_protocol = assume_protocol
-        self._win_icon_path = aui.get_action_icon_path(text.UUID)
-        self._clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+        self._scheme_prefix = f"{assume_protocol}://"
         self._process = None
         self._formatted_address = ""
         self._folder_path = ""
-        self._buff = ""
+        self._clipboard_repo = ("", "")
+        self._lines = collections.deque(maxlen=CLONE_INFO_MAX_LINES)
+        self._pending = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._stderr_fd = -1
+        self._stderr_offset = 0
         self._cancelled = False
 
-    def get_address_from_clipboard(self) -> str:
-        clipcontent = self._clipboard.wait_for_text()
+    @functools.cached_property
+    def _clipboard(self):
+        from gi.repository import Gtk, Gdk
+
+        return Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+
+    def get_address_from_clipboard(self, clipcontent: str | None) -> str:
         addresscontent = ""
 
-        if clipcontent:
+        # Cheaply reject what obviously isn't a single address, e.g. a copied
+        # README section, before doing any other work on it.
+        if (
+            clipcontent
+            and len(clipcontent) <= MAX_CLIPBOARD_ADDRESS_LENGTH
+            and "\n" not in clipcontent.strip()
+        ):
             clipaddress = self._clean_address(clipcontent)
             reponame = self.extract_repo_name_from_address(clipaddress)
             if reponame and not " " in clipaddress:
                 log("Info: Got clipboard address:", clipaddress)
                 addresscontent = clipaddress
+                self._clipboard_repo = (clipaddress, reponame)
 
         if not addresscontent:
             log("Info: Couldn't get a valid git address from the clipboard")
@@ -64,42 +108,58 @@ class GitRepoCloneAction:
         return addresscontent
 
     def extract_repo_name_from_address(self, address: str) -> str:
-        re_match = re.search(REPO_NAME_REGEX, address)
-        if re_match is not None:
-            name = re_match.group(1)
-            name = name.replace(".git", "")
-            if not any(UNCOMMON_REPO_NAME_CHARS_SET.intersection(name)):
-                return name
+        _, sep, name = address.rstrip("/").rpartition("/")
+
+        if sep:
+            name = name.removesuffix(".git")
+        else:
+            # scp-like addresses without a path separator, e.g. `git@host:repo.git`
+            re_match = REPO_NAME_REGEX.search(address)
+            name = re_match.group(1) if re_match is not None else ""
+
+        if name and UNCOMMON_REPO_NAME_CHARS_SET.isdisjoint(name):
+            return name
         return ""
 
+    def _on_clipboard_text(self, clipboard, clipcontent: str | None, entry) -> None:
+        clipaddress = self.get_address_from_clipboard(clipcontent)
+        # Don't override what the user may have typed in the meantime.
+        if clipaddress and entry.get_mapped() and not entry.get_text():
+            entry.set_text(clipaddress)
+
     def prompt_user_for_repo_address(self, default_address: str = "") -> str | None:
         window = aui.EntryDialogWindow(
             title=text.ACTION_TITLE,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
             label=text.ADDRESS_ENTRY_LABEL,
             default_text=default_address,
         )
 
+        if not default_address:
+            # The dialog shows up right away, the address is filled in
+            # once the clipboard owner answers.
+            self._clipboard.request_text(self._on_clipboard_text, window.dialog.entry)
+
         response = window.run()
         window.destroy()
 
         if response is None:
             log("Info: User cancelled the operation")
-            exit(1)
+            sys.exit(1)
 
-        response = response.strip().rstrip("/")
+        response = self._clean_address(response)
 
         if response == "":
             log("Error: Invalid repository address")
             self.prompt_user_git_address_invalid(response)
-            exit(1)
+            sys.exit(1)
 
         return response
 
     def prompt_user_for_cloned_folder_name(self, default_name: str) -> str | None:
         window = aui.EntryDialogWindow(
             title=text.ACTION_TITLE,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
             label=text.FOLDER_NAME_ENTRY_LABEL,
             default_text=default_name,
         )
@@ -114,7 +174,7 @@ class GitRepoCloneAction:
         window = aui.InfoDialogWindow(
             title=text.ACTION_TITLE,
             message=text.ADDRESS_INVALID,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
         )
         window.run()
         window.destroy()
@@ -124,7 +184,7 @@ class GitRepoCloneAction:
         window = aui.InfoDialogWindow(
             title=text.ACTION_TITLE,
             message=text.FOLDER_NAME_INVALID,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
         )
         window.run()
         window.destroy()
@@ -134,122 +194,179 @@ class GitRepoCloneAction:
         window = aui.InfoDialogWindow(
             title=text.ACTION_TITLE,
             message=text.FOLDER_ALREADY_EXISTS_AT_PATH % f"<b>{folder_name}</b>",
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
         )
         window.run()
         window.destroy()
 
     def _clean_address(self, address: str) -> str:
-        address = address.replace("git clone", "").strip()
-        address = address.rstrip("?").rstrip("/")
-        return address
+        # Drops a pasted `git clone` prefix and surrounding spaces, `?` and `/`.
+        return CLEAN_ADDRESS_REGEX.fullmatch(address).group(1)
 
     def _format_address(self, address: str) -> str:
         address = self._clean_address(address)
 
-        if os.path.exists(address):
-            address = f"file://{Path(address).resolve()}"
-
         if address.startswith("git@"):
-            pass  # Don't prepend/append anything
-        elif address.startswith("file://"):
-            pass  # Don't prepend/append anything
+            return address  # scp-like syntax, used as is
         elif address.startswith("://"):
-            address = f"{self._assume_protocol}{address}"
-        elif not "://" in address:
-            address = f"{self._assume_protocol}://{address}"
-
-        return address
+            return self._assume_protocol + address
+        elif SCHEME_REGEX.match(address):
+            return address  # Already has a scheme, file:// included
+        elif os.path.exists(address):
+            return f"file://{os.path.realpath(address)}"
+        else:
+            return self._scheme_prefix + address
 
     def clone_git_repo(self, address: str, local_path: str) -> bool:
         log(f"Info: cloning from {address!r}")
         log(f"Info: cloning to {local_path!r}")
 
+        # Git writes its progress into an in-memory file instead of a pipe, so
+        # it never blocks on a full pipe buffer between two progress ticks.
+        self._stderr_fd = os.memfd_create("git-clone-stderr", os.MFD_CLOEXEC)
+
+        command = ["git", "clone", "--progress"]
+        if FAST_CLONE:
+            command.append("--filter=blob:none")
+
+        # Git runs in its own session so that cancelling can also stop the helper
+        # processes it spawns (e.g. git-remote-https and git-index-pack).
         self._process = subprocess.Popen(
-            ["git", "clone", "--progress", address, local_path],
+            [*command, address, local_path],
             stdout=subprocess.DEVNULL,
-            stderr=subprocess.PIPE,
+            stderr=self._stderr_fd,
+            start_new_session=True,
         )
 
         window = aui.ProgressbarDialogWindow(
             title=text.ACTION_TITLE,
             message=text.CLONING_FOR % address,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
             timeout_callback=self._handle_progress,
             on_cancel_callback=self._handle_cancel,
-            timeout_ms=35,
+            timeout_ms=PROGRESS_TICK_MS,
+        )
+
+        # The main loop gets notified once git exits, no need to poll for it.
+        GLib.child_watch_add(
+            GLib.PRIORITY_DEFAULT, self._process.pid, self._on_git_exit, window
         )
 
         window.run()
         window.destroy()
 
-        return self._process.poll() == 0
+        # Git may have written its last lines after the final progress tick.
+        self._feed(self._read_stderr(final=True))
+        os.close(self._stderr_fd)
+
+        return not self._cancelled and self._process.returncode == 0
 
     def run(self) -> None:
-        clipaddress = self.get_address_from_clipboard()
-        address = self.prompt_user_for_repo_address(clipaddress)
-        folder_name = self.extract_repo_name_from_address(address)
+        address = self.prompt_user_for_repo_address()
+        # The name of an address accepted from the clipboard was already extracted.
+        clipaddress, folder_name = self._clipboard_repo
+        if address != clipaddress:
+            folder_name = self.extract_repo_name_from_address(address)
 
         if not address or not folder_name:
             self.prompt_user_git_address_invalid(address)
-            exit(1)
+            sys.exit(1)
 
         log("Info: Address:", address)
 
         folder_name = self.prompt_user_for_cloned_folder_name(folder_name)
 
         if not folder_name:
-            exit(1)  # On user cancel
+            sys.exit(1)  # On user cancel
         elif folder_name == "":
             self.prompt_user_folder_name_invalid(folder_name)
-            exit(1)
+            sys.exit(1)
 
         log("Info: Folder name:", folder_name)
 
-        self._folder_path = os.path.join(self._directory, folder_name)
+        self._folder_path = f"{self._directory}/{folder_name}"
 
-        if os.path.exists(self._folder_path):
+        if os.path.lexists(self._folder_path):
             self.prompt_folder_already_exists(folder_name)
-            exit(1)
+            sys.exit(1)
 
         self._formatted_address = self._format_address(address)
         success = self.clone_git_repo(self._formatted_address, self._folder_path)
 
-        if self._cancelled and os.path.exists(self._folder_path):
+        if self._cancelled and os.path.lexists(self._folder_path):
             self.prompt_remove_residual_folder_on_clone_canceled(self._folder_path)
-            exit(0)
-        elif not success or not os.path.exists(self._folder_path):
+            sys.exit(0)
+        elif not success or not os.path.isdir(f"{self._folder_path}/.git"):
             self.prompt_unsuccessful_cloning(self._formatted_address)
-            exit(1)
+            sys.exit(1)
         else:
             self.prompt_successful_cloning(self._folder_path)
-            exit(0)
+            sys.exit(0)
 
     def _handle_progress(self, user_data, window: aui.ProgressbarDialogWindow) -> bool:
-        if self._process and self._process.poll() is None:
-            try:
-                if self._process.stderr.readable():
-                    self._buff += self._process.stderr.read(8).decode("utf-8")
-                    split_content = self._buff.split("\n")
-                    window.progressbar.set_text(_r(split_content[-1]))
-                window.progressbar.pulse()
-            except UnicodeDecodeError as e:
-                log("Exception:", e)
-
-        if self._process and self._process.poll() is not None:
-            window.stop()
-            window.destroy()
-            return False
-
+        content = self._read_stderr()
+        if content:
+            self._feed(content)
+            window.progressbar.set_text(_r(self._pending))
+        window.progressbar.pulse()
         return True
 
+    def _on_git_exit(
+        self, pid: int, status: int, window: aui.ProgressbarDialogWindow
+    ) -> None:
+        # GLib already reaped git, so Popen must not try to wait for it again.
+        self._process.returncode = os.waitstatus_to_exitcode(status)
+        window.stop()
+        window.destroy()
+
+    def _read_stderr(self, final: bool = False) -> str:
+        # Drain everything written since the last read, so that the text
+        # shown is always git's latest progress and never lags behind.
+        size = os.fstat(self._stderr_fd).st_size - self._stderr_offset
+        # pread leaves the file offset shared with git untouched.
+        content = os.pread(self._stderr_fd, size, self._stderr_offset)
+        self._stderr_offset += len(content)
+        return self._decoder.decode(content, final=final)
+
+    def _feed(self, content: str) -> None:
+        # Only the unfinished line is kept around, finished ones are collapsed once.
+        *lines, pending = (self._pending + content).split("\n")
+        self._lines.extend(_r(line) for line in lines)
+        # What precedes the last carriage return is already rendered, so collapse
+        # it now instead of walking over every progress update on each tick.
+        rendered, cr, overwrite = pending.rpartition("\r")
+        self._pending = _r(rendered) + cr + overwrite
+
     def _handle_cancel(self) -> None:
-        self._process.kill()
+        if self._process.returncode is not None or self._cancelled:
+            return  # Already done or being cancelled, nothing to cancel
+
         self._cancelled = True
+        self._signal_git(signal.SIGTERM)
+        kill_id = GLib.timeout_add_seconds(2, self._signal_git, signal.SIGKILL)
+
+        # GLib may already have reaped git (without pidfd support it does so from
+        # its own thread), so its exit status only ever arrives through the child
+        # watch. Keep the loop going until it does, as the dialog stops it on return.
+        context = GLib.MainContext.default()
+        while self._process.returncode is None:
+            context.iteration(True)
+
+        if context.find_source_by_id(kill_id) is not None:
+            GLib.source_remove(kill_id)  # Git exited before it had to be killed
+
+        # A clone that finished before it could be stopped wasn't cancelled.
+        self._cancelled = self._process.returncode != 0
+
+    def _signal_git(self, signum: int) -> bool:
+        # Also reaches the helpers git spawns, which share its process group.
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(self._process.pid, signum)
+        return False
 
-    def send_item_to_trash(self, item: Path) -> bool:
+    def send_item_to_trash(self, item: str) -> bool:
         try:
-            file = Gio.File.new_for_path(item.as_posix())
+            file = Gio.File.new_for_path(item)
             file.trash(cancellable=None)
             return True
         except Exception as e:
@@ -260,14 +377,14 @@ class GitRepoCloneAction:
         window = aui.QuestionDialogWindow(
             title=text.ACTION_TITLE,
             message=text.REMOVE_RESIDUAL_FOLDER_ON_CANCEL,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
         )
         response = window.run()
         window.destroy()
 
         trashed = False
         if response == window.RESPONSE_YES:
-            trashed = self.send_item_to_trash(Path(folder))
+            trashed = self.send_item_to_trash(folder)
 
         res = "was" if trashed else "wasn't"
         log(f"Info: residual folder from cancellation {folder!r} {res} sent to trash")
@@ -280,7 +397,7 @@ class GitRepoCloneAction:
         window = aui.ActionableDialogWindow(
             title=text.ACTION_TITLE,
             message=text.SUCCESSFUL_CLONING,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
             buttons=[open_cloned_folder_button],
         )
         window.run()
@@ -297,7 +414,7 @@ class GitRepoCloneAction:
             log(f"Error: Couldn't open the cloned folder: {e}")
             window = aui.InfoDialogWindow(
                 title=text.ACTION_TITLE,
-                window_icon_path=self._win_icon_path,
+                window_icon_path=WIN_ICON_PATH,
                 message=text.UNSUCCESSFUL_OPEN_CLONED_FOLDER,
             )
             window.run()
@@ -305,14 +422,11 @@ class GitRepoCloneAction:
 
     def prompt_unsuccessful_cloning(self, repository_address):
         log(f"Error: repo {repository_address!r} wasn't cloned successfully")
-        buffer_clean = "\n".join(_r(line) for line in self._buff.split("\n"))
-        stderr_buf = self._process.stderr.read().decode("utf-8")
-        stderr_buf_clean = "\n".join(_r(line) for line in stderr_buf.split("\n"))
-        cloning_info = buffer_clean + stderr_buf_clean
+        cloning_info = "\n".join([*self._lines, _r(self._pending)])
         log("Error: Git stderr message:", cloning_info)
         window = aui.InfoDialogWindow(
             title=text.ACTION_TITLE,
-            window_icon_path=self._win_icon_path,
+            window_icon_path=WIN_ICON_PATH,
             message=text.UNSUCCESSFUL_CLONING % f"<b>{repository_address}</b>",
             expander_label=text.CLONE_INFO,
             expanded_text=cloning_info,
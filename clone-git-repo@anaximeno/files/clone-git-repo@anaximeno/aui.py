@@ -26,6 +26,8 @@ SOFTWARE.
 """
 
 import os
+import functools
+import itertools
 import gi
 
 gi.require_version("Gtk", "3.0")
@@ -39,6 +41,7 @@ ACTIONS_DIR = ".local/share/nemo/actions"
 ICON_FILENAME = "icon.png"
 
 
+@functools.lru_cache(maxsize=None)
 def get_action_icon_path(uuid: str, use_dev_icon_if_found=None) -> str:
     """Returns the path of the `icon.png` file of the action.
 
@@ -59,6 +62,12 @@ def get_action_icon_path(uuid: str, use_dev_icon_if_found=None) -> str:
     return icon_path
 
 
+@functools.lru_cache(maxsize=None)
+def _load_icon(icon_path: str) -> GdkPixbuf.Pixbuf:
+    # Dialogs opened one after another share the same icon, decode it once.
+    return GdkPixbuf.Pixbuf.new_from_file(icon_path)
+
+
 class DialogWindow(Gtk.Window):
     dialog: Gtk.Dialog
 
@@ -66,7 +75,7 @@ class DialogWindow(Gtk.Window):
         super().__init__(*args, **kwargs)
         self._icon_path = icon_path
         if self._icon_path is not None and os.path.exists(self._icon_path):
-            self._icon = GdkPixbuf.Pixbuf.new_from_file(self._icon_path)
+            self._icon = _load_icon(self._icon_path)
             self.set_icon(self._icon)
 
     def run(self):
@@ -92,11 +101,7 @@ class _InfoDialog(Gtk.Dialog):
         super().__init__(*args, title=title, **kwargs)
         self.add_buttons(Gtk.STOCK_OK, Gtk.ResponseType.OK)
         self._box = Gtk.VBox()
-        self.label = Gtk.Label()
-        self.label.set_margin_top(10)
-        self.label.set_margin_bottom(10)
-        self.label.set_margin_start(10)
-        self.label.set_margin_end(10)
+        self.label = Gtk.Label(margin=10)
         self.label.set_halign(Gtk.Align.CENTER)
         self.label.set_valign(Gtk.Align.CENTER)
         self.label.set_markup(message)
@@ -108,11 +113,9 @@ class _InfoDialog(Gtk.Dialog):
 
         if expander_label:
             self.expander = Gtk.Expander(label=expander_label)
-            self.expanded_text_label = Gtk.Label()
+            self.expanded_text_label = Gtk.Label(margin_top=5, margin_start=10)
             self.expanded_text_label.set_markup(expanded_text)
             self.expanded_text_label.set_halign(Gtk.Align.START)
-            self.expanded_text_label.set_margin_top(5)
-            self.expanded_text_label.set_margin_start(10)
             self.expander.add(self.expanded_text_label)
             self._box.pack_start(self.expander, True, True, 10)
 
@@ -199,17 +202,15 @@ class _EntryDialog(Gtk.Dialog):
         self._box = Gtk.VBox(spacing=0)
 
         if label is not None:
-            self._label = Gtk.Label(xalign=0)
-            self._label.set_margin_top(2)
-            self._label.set_margin_start(5)
-            self._label.set_margin_end(5)
+            self._label = Gtk.Label(
+                xalign=0, margin_top=2, margin_start=5, margin_end=5
+            )
             self._label.set_markup(label)
             self._box.pack_start(self._label, False, False, 5)
 
-        self.entry = Gtk.Entry(text=default_text)
-        self.entry.set_margin_bottom(2)
-        self.entry.set_margin_start(5)
-        self.entry.set_margin_end(5)
+        self.entry = Gtk.Entry(
+            text=default_text, margin_bottom=2, margin_start=5, margin_end=5
+        )
         self._box.pack_start(self.entry, True, True, 0)
 
         self._content_area = self.get_content_area()
@@ -265,10 +266,7 @@ class _ProgressbarDialog(Gtk.Dialog):
         super().__init__(title=title, **kwargs)
         self.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL)
         self.box = Gtk.VBox(spacing=15)
-        self.progressbar = Gtk.ProgressBar()
-        self.progressbar.set_margin_top(10)
-        self.progressbar.set_margin_start(5)
-        self.progressbar.set_margin_end(5)
+        self.progressbar = Gtk.ProgressBar(margin_top=10, margin_start=5, margin_end=5)
 
         if message:
             self.progressbar.set_text(message)
@@ -279,14 +277,12 @@ class _ProgressbarDialog(Gtk.Dialog):
         self.expander = None
         self.expanded_text_label = None
         if expander_label:
-            self.expander = Gtk.Expander(label=expander_label)
-            self.expander.set_margin_start(5)
-            self.expander.set_margin_end(5)
-            self.expanded_text_label = Gtk.Label()
+            self.expander = Gtk.Expander(
+                label=expander_label, margin_start=5, margin_end=5
+            )
+            self.expanded_text_label = Gtk.Label(margin_top=5, margin_start=10)
             self.expanded_text_label.set_markup(expanded_text)
             self.expanded_text_label.set_halign(Gtk.Align.START)
-            self.expanded_text_label.set_margin_top(5)
-            self.expanded_text_label.set_margin_start(10)
             self.expander.add(self.expanded_text_label)
             self.box.pack_start(self.expander, True, True, 0)
 
@@ -416,7 +412,8 @@ class _RadioChoiceDialog(Gtk.Dialog):
             Gtk.ResponseType.OK,
         )
 
-        self.radio_buttons = radio_buttons
+        # Kept as a tuple, RadioChoiceDialogWindow.run walks the buttons again.
+        self.radio_buttons = tuple(radio_buttons)
         self._radio_buttons_spacing = radio_spacing
         self._default_active_button_id = default_active_button_id
         self._radio_orientation = radio_orientation
@@ -435,21 +432,14 @@ class _RadioChoiceDialog(Gtk.Dialog):
 
         self._box.pack_start(self._radio_box, True, True, 0)
 
-        if any(self.radio_buttons):
-            first_button = self.radio_buttons[0]
-            first_gtk_btn = first_button.create_gtk_button(None)
+        gtk_btn = None
+        for radio_button in self.radio_buttons:
+            # Every button joins the group of the one created before it.
+            gtk_btn = radio_button.create_gtk_button(gtk_btn)
+            self._radio_box.pack_start(gtk_btn, False, False, 0)
 
-            if first_button.id == self._default_active_button_id:
-                first_gtk_btn.set_active(True)
-
-            self._radio_box.pack_start(first_gtk_btn, False, False, 0)
-
-            for radio_button in self.radio_buttons[1:]:
-                gtk_btn = radio_button.create_gtk_button(first_gtk_btn)
-                self._radio_box.pack_start(gtk_btn, False, False, 0)
-
-                if radio_button.id == self._default_active_button_id:
-                    gtk_btn.set_active(True)
+            if radio_button.id == self._default_active_button_id:
+                gtk_btn.set_active(True)
 
         self._content_area = self.get_content_area()
         self._content_area.add(self._box)
@@ -499,18 +489,13 @@ class RadioChoiceDialogWindow(DialogWindow):
 
 
 class ActionableButton:
-    _id_counter = 0
+    _ids = itertools.count(1)
 
     def __init__(self, text: str, on_click_action: Callable) -> None:
-        self._id = self._get_id()
+        self._id = next(ActionableButton._ids)
         self._on_click_action = on_click_action
         self._text = text
 
-    @classmethod
-    def _get_id(cls):
-        cls._id_counter += 1
-        return cls._id_counter
-
     @property
     def id(self) -> str:
         return self._id
@@ -540,11 +525,7 @@ class _ActionableDialog(Gtk.Dialog):
     ) -> None:
         super().__init__(*args, title=title, **kwargs)
         self._box = Gtk.VBox()
-        self._label = Gtk.Label()
-        self._label.set_margin_top(10)
-        self._label.set_margin_bottom(10)
-        self._label.set_margin_start(10)
-        self._label.set_margin_end(10)
+        self._label = Gtk.Label(margin=10)
         self._label.set_halign(Gtk.Align.CENTER)
         self._label.set_valign(Gtk.Align.CENTER)
         self._label.set_markup(message)
@@ -3,12 +3,10 @@ import gettext
 
 UUID = "clone-git-repo@anaximeno"
 HOME = os.path.expanduser("~")
-gettext.bindtextdomain(UUID, os.path.join(HOME, ".local/share/locale"))
-gettext.textdomain(UUID)
-
-
-def _(message: str) -> str:
-    return gettext.gettext(message)
+# Load the catalog once, gettext.gettext would look it up again for every string.
+_ = gettext.translation(
+    UUID, os.path.join(HOME, ".local/share/locale"), fallback=True
+).gettext
 
 
 ACTION_TITLE = _("Clone a repository")
@@ -8,10 +8,10 @@ import gi
 import text
 from converters import AudioConverter, Converter, ImageConverter, VideoConverter
 from custom_aui import SelectDropdownDialogWindow
-from gi.repository import Gtk
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("Gio", "2.0")
+from gi.repository import Gio
 
 FORMATTERS = {
     "IMAGE": {
@@ -58,6 +58,27 @@ FORMATTERS = {
     },
 }
 
+# Enough of the file for the content type magic to recognize the common media containers.
+SNIFF_SIZE = 4096
+
+MIME_FORMAT_TYPES = {
+    "image": "IMAGE",
+    "video": "VIDEO",
+    "audio": "AUDIO",
+}
+
+# Suffixes that name a format listed in FORMATTERS under another name.
+FORMAT_ALIASES = {
+    "JPG": "JPEG",
+    "TIF": "TIFF",
+}
+
+FORMAT_TYPES = {
+    file_format: format_type
+    for format_type, formatter in FORMATTERS.items()
+    for file_format in formatter["FORMATS"]
+}
+
 
 class Action:
     """
@@ -72,8 +93,10 @@ class Action:
 
     Methods:
         valid_file() -> bool: Checks if the file is valid for conversion.
-        _get_file_format_type() -> Optional[str]: Determines the file format typebased on its suffix.
-        _get_available_formats() -> Optional[Tuple[str]]: Retrieves available target formats based on the file format type.
+        _get_file_format_type() -> Optional[str]: Determines the file format type based on its suffix or contents.
+        _sniff_file_format_type() -> Optional[str]: Determines the file format type from the start of the file.
+        _get_file_format() -> str: Determines the format of the file based on its suffix.
+        _get_available_formats() -> Optional[Tuple[str]]: Retrieves available target formats based on the file format type, except the current one.
         _select_format() -> str: Displays a dialog window to select the target format for conversion.
 
     When an instance of this class is created, it checks the validity of the file, determines the file format type,
@@ -129,29 +152,72 @@ class Action:
 
     def _get_file_format_type(self) -> Optional[str]:
         """
-        Determines the file format type based on the suffix of the file.
+        Determines the file format type based on the suffix of the file, or on its contents where they disagree.
+
+        Audio and video often share a container, e.g. an ISO media '.m4a' file is sniffed as video/mp4,
+        so the contents only take precedence when the suffix is unknown or when one of the two says image.
 
         Returns:
             Optional[str]: The file format type if it is found in the FORMATTERS dictionary, None otherwise.
         """
-        suffix = self.file.suffix[1:].upper()
+        suffix_type = FORMAT_TYPES.get(self._get_file_format())
+        sniffed_type = self._sniff_file_format_type()
 
-        return next(
-            (key for key, value in FORMATTERS.items() if suffix in value["FORMATS"]),
-            None,
-        )
+        if suffix_type is None or "IMAGE" in (suffix_type, sniffed_type):
+            return sniffed_type or suffix_type
+        return suffix_type
+
+    def _sniff_file_format_type(self) -> Optional[str]:
+        """
+        Determines the file format type from the first bytes of the file.
+
+        The content type is guessed by Gio from the header alone, without the file name, which Gio
+        would otherwise trust over the data for any known extension. So a mis-named file is still
+        sent to the converter that can handle it instead of failing in it.
+
+        Returns:
+            Optional[str]: The file format type if the contents are recognized as an image, video or audio, None otherwise.
+        """
+        try:
+            with self.file.open("rb") as file:
+                header = file.read(SNIFF_SIZE)
+        except OSError:
+            return None
+
+        content_type, uncertain = Gio.content_type_guess(None, header)
+        if uncertain:
+            return None
+
+        mime_type = Gio.content_type_get_mime_type(content_type) or ""
+        return MIME_FORMAT_TYPES.get(mime_type.partition("/")[0])
+
+    def _get_file_format(self) -> str:
+        """
+        Determines the format of the file based on its suffix.
+
+        Returns:
+            str: The format as named in the FORMATTERS dictionary, e.g. 'JPEG' for a '.jpg' file.
+        """
+        suffix = self.file.suffix[1:].upper()
+        return FORMAT_ALIASES.get(suffix, suffix)
 
     def _get_available_formats(self) -> Optional[Tuple[str]]:
         """
         Determines the available target formats based on the file format type.
 
+        The format the file is already in is left out, converting to it would only re-encode the file.
+
         Returns:
             Optional[Tuple[str]]: A tuple of available target formats if the file format type is found in the FORMATTERS dictionary, None otherwise.
         """
-        return (
-            FORMATTERS[self.file_format_type]["FORMATS"]
-            if self.file_format_type
-            else None
+        if not self.file_format_type:
+            return None
+
+        file_format = self._get_file_format()
+        return tuple(
+            target_format
+            for target_format in FORMATTERS[self.file_format_type]["FORMATS"]
+            if target_format != file_format
         )
 
     def _select_format(self) -> str:
@@ -161,11 +227,15 @@ class Action:
         Returns:
             str: The selected target format for conversion.
         """
+        default_format = FORMATTERS[self.file_format_type]["DEFAULT"]
+        if default_format not in self.target_formats:
+            default_format = self.target_formats[0]
+
         dialog = SelectDropdownDialogWindow(
             title=text.SELECT_TITLE,
             label=text.SELECT_LABEL,
             choices=self.target_formats,
-            default_choice=FORMATTERS[self.file_format_type]["DEFAULT"],
+            default_choice=default_format,
         )
 
         response = dialog.run()
@@ -1,11 +1,153 @@
 import contextlib
+import functools
+import json
+import os
+import shutil
 import subprocess
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import FrozenSet, Optional
 
 import text
 from aui import InfoDialogWindow, ProgressbarDialogWindow
 
+NVIDIA_DEVICE = "/dev/nvidia0"
+RENDER_DEVICE = "/dev/dri/renderD128"
+FFMPEG_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path(text.HOME, ".cache"))
+    / text.UUID
+    / "ffmpeg.json"
+)
+
+# Formats whose default ffmpeg video codec is already H.264, so a hardware
+# H.264 encoder produces the same kind of file as the software one.
+HWACCEL_VIDEO_FORMATS = ("MKV", "MOV", "MP4")
+
+
+@functools.lru_cache(maxsize=None)
+def get_ffmpeg_info() -> dict:
+    """
+    Describes the installed ffmpeg build.
+
+    The encoders are read from 'ffmpeg -encoders' and kept in a cache file together with the hardware
+    acceleration backends that failed to convert, so they are only read again once the ffmpeg executable
+    is replaced, e.g. by a package upgrade.
+
+    Returns:
+        dict: The 'ffmpeg' path, its 'mtime', its 'encoders' and its 'failed_hwaccels', empty if ffmpeg could not be run.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        return {}
+
+    mtime = os.stat(ffmpeg).st_mtime_ns
+
+    with contextlib.suppress(OSError, ValueError, KeyError, TypeError):
+        info = json.loads(FFMPEG_CACHE_FILE.read_text())
+        if info["ffmpeg"] == ffmpeg and info["mtime"] == mtime:
+            return info
+
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return {}
+
+    if result.returncode != 0:
+        return {}
+
+    # The encoders are listed after the legend, which ends with a ' ------' line.
+    _, _, listing = result.stdout.partition(" ------\n")
+
+    info = {
+        "ffmpeg": ffmpeg,
+        "mtime": mtime,
+        "encoders": sorted(
+            fields[1]
+            for fields in (line.split() for line in listing.splitlines())
+            if len(fields) > 1
+        ),
+        "failed_hwaccels": [],
+    }
+    save_ffmpeg_info(info)
+    return info
+
+
+def save_ffmpeg_info(info: dict) -> None:
+    """
+    Writes the description of the installed ffmpeg build to the cache file.
+
+    The file is written aside and renamed into place, so a concurrent run never reads half of it.
+    Failing to write it only means ffmpeg is probed again on the next run.
+    """
+    with contextlib.suppress(OSError):
+        FFMPEG_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = FFMPEG_CACHE_FILE.with_name(
+            f"{FFMPEG_CACHE_FILE.name}.{os.getpid()}"
+        )
+        temp_file.write_text(json.dumps(info))
+        temp_file.replace(FFMPEG_CACHE_FILE)
+
+
+def get_ffmpeg_encoders() -> FrozenSet[str]:
+    """
+    Lists the encoders available in the installed ffmpeg build.
+
+    Returns:
+        FrozenSet[str]: The encoder names, empty if ffmpeg could not be run.
+    """
+    return frozenset(get_ffmpeg_info().get("encoders", ()))
+
+
+def mark_hwaccel_failed(hwaccel: str) -> None:
+    """
+    Records that converting with a hardware acceleration backend failed.
+
+    Later runs then convert in software right away, instead of failing with the backend first.
+    E.g. VAAPI is listed by ffmpeg and has a render node on most machines, including virtual
+    machines and GPUs that cannot encode H.264 at all.
+    """
+    info = get_ffmpeg_info()
+    if not info:
+        return
+
+    failed_hwaccels = info.setdefault("failed_hwaccels", [])
+    if hwaccel not in failed_hwaccels:
+        failed_hwaccels.append(hwaccel)
+        save_ffmpeg_info(info)
+
+
+def get_video_hwaccel() -> Optional[str]:
+    """
+    Determines the hardware acceleration backend to use for video conversion.
+
+    NVENC is preferred, then VAAPI, which covers Intel and AMD GPUs. A backend is only picked when
+    its device node exists, since distribution builds of ffmpeg list the hardware encoders whether
+    or not there is a GPU to run them on, and when it has not failed to convert before.
+
+    Returns:
+        Optional[str]: The ffmpeg hwaccel name of the backend, or None to convert in software.
+    """
+    encoders = get_ffmpeg_encoders()
+    failed_hwaccels = get_ffmpeg_info().get("failed_hwaccels", ())
+
+    if (
+        "cuda" not in failed_hwaccels
+        and os.path.exists(NVIDIA_DEVICE)
+        and "h264_nvenc" in encoders
+    ):
+        return "cuda"
+    if (
+        "vaapi" not in failed_hwaccels
+        and os.path.exists(RENDER_DEVICE)
+        and "h264_vaapi" in encoders
+    ):
+        return "vaapi"
+    return None
+
 
 class Converter(ABC):
     """
@@ -24,6 +166,8 @@ class Converter(ABC):
         convert(self) -> bool: Initiates the conversion process and displays a progress bar.
         valid_target_file(self) -> None: Checks and generates a valid target file name.
         _error_dialog(self) -> None: Displays an error dialog if an error occurs during conversion.
+        _fallback(self) -> bool: Switches to an alternative command after a failed conversion.
+        _fallback_succeeded(self) -> None: Handles the success of a conversion retried after a fallback.
         _delete_target_file(self) -> None: Deletes the target file if it exists.
         _handle_cancel(self) -> bool: Handles the cancellation of the conversion process.
         _handle_progress(self, _, window: ProgressbarDialogWindow) -> bool: Handles the progress of the conversion process.
@@ -101,6 +245,7 @@ class Converter(ABC):
 
         This method creates a ProgressbarDialogWindow to display the progress of the conversion process.
         It checks for cancellation of the process and error conditions.
+        If the process fails and the converter has a fallback command, the conversion is retried with it.
         If the process completes successfully, it displays a success dialog; otherwise, it shows an error dialog.
         Returns True if the conversion process is successful, False otherwise.
         """
@@ -118,12 +263,39 @@ class Converter(ABC):
             return False
 
         if self._process.returncode != 0:
+            if self._fallback():
+                self._delete_target_file()
+                if not self.convert():
+                    return False
+
+                self._fallback_succeeded()
+                return True
+
             self._error_dialog()
             return False
 
         self._success_dialog()
         return True
 
+    def _fallback(self) -> bool:
+        """
+        Switches to an alternative command after a failed conversion.
+
+        Subclasses that try a faster but less portable command first can override this method
+        to rebuild 'self.command' with a safer one.
+        Returns True if a new command was built and the conversion should be retried, False otherwise.
+        """
+        return False
+
+    def _fallback_succeeded(self) -> None:
+        """
+        Handles the success of a conversion retried after a fallback.
+
+        Subclasses can override this method to remember that the command they tried first failed,
+        once it is known that the file itself could be converted.
+        """
+        pass
+
     def _handle_cancel(self) -> bool:
         """
         Deletes the target file if the conversion process is canceled.
@@ -240,22 +412,73 @@ class VideoConverter(Converter):
             file (Path): The input video file to be converted.
             format (str): The format to convert the video file to.
             target_file (Path): The output video file after conversion.
+        hwaccel (Optional[str]): The hardware acceleration backend used for the conversion, None for software.
 
     Methods:
         Inherits methods from the 'Converter' class:
             build_command(self) -> None: Method to build the FFmpeg command for video conversion.
+            _fallback(self) -> bool: Drops hardware acceleration if the accelerated conversion failed.
+            _fallback_succeeded(self) -> None: Drops the failed backend for later runs once the software conversion succeeded.
 
+    When a supported GPU is found, H.264 targets are encoded on it (NVENC or VAAPI),
+    and a failed accelerated conversion is retried in software.
     This class should be used to convert video files to different formats by implementing the 'build_command' method with the appropriate FFmpeg command.
     """
 
+    HWACCEL_ARGS = {
+        "cuda": (
+            ["-hwaccel", "cuda"],
+            # Constant quality close to libx264's default CRF 23, instead of
+            # NVENC's fixed 2 Mbit/s default bitrate.
+            [
+                "-c:v",
+                "h264_nvenc",
+                "-preset",
+                "p4",
+                "-rc",
+                "vbr",
+                "-cq",
+                "23",
+                "-b:v",
+                "0",
+            ],
+        ),
+        "vaapi": (
+            ["-vaapi_device", RENDER_DEVICE],
+            ["-vf", "format=nv12,hwupload", "-c:v", "h264_vaapi"],
+        ),
+    }
+
+    def __init__(self, file: Path, format: str, **kwargs):
+        self.hwaccel: Optional[str] = (
+            get_video_hwaccel() if format in HWACCEL_VIDEO_FORMATS else None
+        )
+        self._failed_hwaccel: Optional[str] = None
+        super().__init__(file, format, **kwargs)
+
     def build_command(self) -> None:
+        input_args, output_args = self.HWACCEL_ARGS.get(self.hwaccel, ([], []))
         self.command = [
             "ffmpeg",
+            *input_args,
             "-i",
             str(self.file),
+            *output_args,
             str(self.target_file),
         ]
 
+    def _fallback(self) -> bool:
+        if self.hwaccel is None:
+            return False
+
+        self._failed_hwaccel, self.hwaccel = self.hwaccel, None
+        self.build_command()
+        return True
+
+    def _fallback_succeeded(self) -> None:
+        # Only the backend is to blame if the same file converts in software.
+        mark_hwaccel_failed(self._failed_hwaccel)
+
 
 class AudioConverter(Converter):
     """